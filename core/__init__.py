@@ -7,8 +7,9 @@ from .image_processor import ImageProcessor
 from .ocr_engine import OCREngine
 from .classifiers import DocumentClassifier
 from .validators import TCValidator, VKNValidator, DocumentIdentifier
-from .file_operations import FileOperations
-from .processor import process_files_in_directory, process_single_file
+from .file_operations import FileOperations, FileEntry
+from .prefetch import PrefetchReader
+from .processor import process_files_in_directory, process_single_file, get_doc_processor
 from .config import CATEGORIES, CATEGORY_FOLDERS, setup_directories
 from .utils import normalize_filename, print_results
 from .gemini_extractor import GeminiChequeExtractor
@@ -23,8 +24,11 @@ __all__ = [
     'VKNValidator', 
     'DocumentIdentifier',
     'FileOperations',
+    'FileEntry',
+    'PrefetchReader',
     'process_files_in_directory',
     'process_single_file',
+    'get_doc_processor',
     'CATEGORIES',
     'CATEGORY_FOLDERS',
     'setup_directories',
@@ -1,23 +1,38 @@
+import asyncio
 import json
 import os
 from typing import List, Dict, Any
 from .file_operations import FileOperations
-from .config import UPLOAD_FOLDER
+from .config import UPLOAD_FOLDER, GEMINI_MAX_CONCURRENCY
 from .gemini_extractor import GeminiChequeExtractor
 
 
 class ChequeProcessor:
     """Process all cheque files and extract information using Gemini."""
     
-    def __init__(self, gemini_api_key: str = None):
-        """Initialize cheque processor with Gemini extractor."""
+    def __init__(self, gemini_api_key: str = None, use_batch: bool = False):
+        """
+        Initialize cheque processor with Gemini extractor.
+        
+        Args:
+            gemini_api_key (str): Gemini API key (optional if set in environment)
+            use_batch (bool): Submit all cheques as one Gemini batch job instead
+                of calling the API once per file
+        """
         self.extractor = GeminiChequeExtractor(gemini_api_key)
         self.cheque_folder = os.path.join(UPLOAD_FOLDER, 'cheque')
+        self.use_batch = use_batch
     
-    def process_all_cheques(self) -> List[Dict[str, Any]]:
+    def process_all_cheques(self, checkpoint_path: str = None) -> List[Dict[str, Any]]:
         """
         Process all cheque files and extract information.
         
+        Args:
+            checkpoint_path (str): Optional JSONL file. Each successful result
+                is appended to it as soon as it arrives, and files already
+                recorded there are not sent to Gemini again. Failed files are
+                not recorded, so they are retried on the next run.
+        
         Returns:
             List[Dict]: List of extracted cheque information
         """
@@ -34,30 +49,86 @@ class ChequeProcessor:
         
         print(f"Found {len(cheque_files)} cheque files. Processing...")
         
-        results = []
-        for i, file_path in enumerate(cheque_files, 1):
-            print(f"Processing {i}/{len(cheque_files)}: {os.path.basename(file_path)}")
+        # Skip files recorded by an earlier, possibly interrupted, run
+        done = self._read_checkpoint(checkpoint_path) if checkpoint_path else {}
+        pending_files = [path for path in cheque_files if self._checkpoint_key(path) not in done]
+        if done:
+            print(f"Resuming: {len(cheque_files) - len(pending_files)} files already processed.")
+        
+        checkpoint = self._open_checkpoint(checkpoint_path) if checkpoint_path else None
+        try:
+            if not pending_files:
+                new_results = []
+            elif self.use_batch:
+                print("Submitting cheques as a Gemini batch job (this may take a while)...")
+                batch_results = self.extractor.extract_cheque_info_batch(
+                    pending_files, return_exceptions=True
+                )
+                new_results = [
+                    self._record_result(checkpoint, path, cheque_info)
+                    for path, cheque_info in zip(pending_files, batch_results)
+                ]
+            else:
+                new_results = asyncio.run(self._process_all_async(pending_files, checkpoint))
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
+        
+        new_by_path = dict(zip(pending_files, new_results))
+        return [
+            new_by_path[path] if path in new_by_path else done[self._checkpoint_key(path)]
+            for path in cheque_files
+        ]
+    
+    async def _process_all_async(self, files: List[str], checkpoint=None,
+                                 max_concurrency: int = GEMINI_MAX_CONCURRENCY) -> List[Dict[str, Any]]:
+        """
+        Extract information from cheque files concurrently.
+        
+        Args:
+            files (List[str]): Cheque file paths
+            checkpoint: Open JSONL checkpoint file successful results are appended to
+            max_concurrency (int): Maximum number of in-flight Gemini requests
             
-            # Extract information using Gemini
-            cheque_info = self.extractor.extract_cheque_info(file_path)
-            results.append(cheque_info)
+        Returns:
+            List[Dict]: Extracted cheque information, in the order of files
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        completed = 0
         
-        return results
+        async def extract(file_path: str) -> Dict[str, Any]:
+            nonlocal completed
+            async with semaphore:
+                cheque_info = await self.extractor.extract_cheque_info_async(
+                    file_path, return_exceptions=True
+                )
+            
+            cheque_info = self._record_result(checkpoint, file_path, cheque_info)
+            completed += 1
+            print(f"Processed {completed}/{len(files)}: {os.path.basename(file_path)}")
+            return cheque_info
+        
+        return await asyncio.gather(*(extract(file_path) for file_path in files))
     
     def process_and_save_json(self, output_file: str = "cheque_extraction_results.json") -> str:
         """
         Process all cheques and save results to JSON file.
         
+        Results are also streamed to a JSONL checkpoint next to the output
+        file (same name, .jsonl extension) while processing, so an
+        interrupted run resumes where it stopped.
+        
         Args:
             output_file (str): Output JSON file name
             
         Returns:
             str: Path to the saved JSON file
         """
-        results = self.process_all_cheques()
-        
         # Create output path
         output_path = os.path.join(os.getcwd(), output_file)
+        checkpoint_path = os.path.splitext(output_path)[0] + '.jsonl'
+        
+        results = self.process_all_cheques(checkpoint_path)
         
         # Save to JSON
         with open(output_path, 'w', encoding='utf-8') as f:
@@ -71,17 +142,67 @@ class ChequeProcessor:
         
         return output_path
     
+    def _checkpoint_key(self, file_path: str) -> str:
+        """Identify a cheque by its path inside the cheque folder (subfolders may reuse file names)."""
+        return os.path.relpath(file_path, self.cheque_folder).replace(os.sep, '/')
+    
+    def _record_result(self, checkpoint, file_path: str, cheque_info) -> Dict[str, Any]:
+        """Checkpoint a successful result; turn a failure into an all-null result that is not checkpointed."""
+        if isinstance(cheque_info, Exception):
+            return self.extractor.create_null_response(os.path.basename(file_path))
+        
+        self._append_checkpoint(checkpoint, {'path': self._checkpoint_key(file_path), 'result': cheque_info})
+        return cheque_info
+    
+    @staticmethod
+    def _read_checkpoint(checkpoint_path: str) -> Dict[str, Dict[str, Any]]:
+        """Read results recorded in a JSONL checkpoint, keyed by path inside the cheque folder."""
+        done = {}
+        if not os.path.exists(checkpoint_path):
+            return done
+        
+        with open(checkpoint_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Partially written line from an interrupted run
+                    continue
+                if isinstance(record, dict) and record.get('path') and isinstance(record.get('result'), dict):
+                    done[record['path']] = record['result']
+        
+        return done
+    
+    @staticmethod
+    def _open_checkpoint(checkpoint_path: str):
+        """Open a JSONL checkpoint for appending, terminating a partially written last line."""
+        checkpoint = open(checkpoint_path, 'a', encoding='utf-8')
+        if checkpoint.tell() > 0:
+            with open(checkpoint_path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    checkpoint.write('\n')
+        return checkpoint
+    
+    @staticmethod
+    def _append_checkpoint(checkpoint, record: Dict[str, Any]):
+        """Append one record to the checkpoint and flush it to disk."""
+        if checkpoint is None:
+            return
+        checkpoint.write(json.dumps(record, ensure_ascii=False) + '\n')
+        checkpoint.flush()
+    
     def _get_cheque_files(self) -> List[str]:
         """Get all image files from cheque folder."""
         supported_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif'}
         
-        all_files = FileOperations.get_all_files_in_directory(self.cheque_folder)
+        all_files = FileOperations.scan_directory(self.cheque_folder)
         
-        cheque_files = []
-        for file_path in all_files:
-            file_ext = os.path.splitext(file_path)[1].lower()
-            if file_ext in supported_extensions:
-                cheque_files.append(file_path)
+        # Skip files whose content does not match their extension before decoding
+        cheque_files = [
+            entry.path for entry in all_files
+            if entry.ext_lower in supported_extensions and not entry.is_mislabeled
+        ]
         
         return sorted(cheque_files)
     
@@ -121,16 +242,18 @@ class ChequeProcessor:
             print(f"\n... and {len(results) - 3} more files")
 
 
-def extract_cheque_information(gemini_api_key: str = None, output_file: str = "cheque_extraction_results.json") -> str:
+def extract_cheque_information(gemini_api_key: str = None, output_file: str = "cheque_extraction_results.json",
+                               use_batch: bool = False) -> str:
     """
     Convenience function to extract cheque information from all files.
     
     Args:
         gemini_api_key (str): Gemini API key (optional if set in environment)
         output_file (str): Output JSON file name
+        use_batch (bool): Use Gemini Batch Mode (lower cost, results within 24h)
         
     Returns:
         str: Path to the saved JSON file
     """
-    processor = ChequeProcessor(gemini_api_key)
+    processor = ChequeProcessor(gemini_api_key, use_batch=use_batch)
     return processor.process_and_save_json(output_file)
@@ -1,23 +1,174 @@
+import re
+import threading
 from .config import CATEGORIES
 
+try:
+    import hyperscan
+except ImportError:  # Optional dependency (not available on Windows), use the next matcher
+    hyperscan = None
+
+try:
+    import ahocorasick
+except ImportError:  # Optional dependency, fall back to a single regex scan
+    ahocorasick = None
+
 
 class DocumentClassifier:
-    """Classifies documents based on extracted text content."""
+    """
+    Classifies documents based on extracted text content.
+    
+    The keyword matcher is built once per set of categories and shared by
+    all classifiers in the process. With Hyperscan each classifier keeps its
+    own scratch space, so use one classifier per thread.
+    """
+    
+    # Keyword matchers by frozen categories: (keyword ranks, matcher)
+    _shared_matchers = {}
+    _shared_lock = threading.Lock()
     
     def __init__(self, categories: dict = None):
-        """Initialize classifier with categories."""
+        """Initialize classifier with categories and build the keyword matcher."""
         self.categories = categories or CATEGORIES
+        
+        # Freeze categories once into tuples
+        self._frozen = tuple(
+            (category, self._freeze_keywords(keywords))
+            for category, keywords in self.categories.items()
+        )
+        self._category_order = tuple(category for category, _ in self._frozen)
+        self._keyword_ranks, matcher = self._get_shared_matcher()
+        
+        if hyperscan is not None:
+            self._database = matcher
+            self._scratch = hyperscan.Scratch(matcher)
+            self._find_best_rank = self._best_rank_hyperscan
+        elif ahocorasick is not None:
+            self._automaton = matcher
+            self._find_best_rank = self._best_rank_automaton
+        else:
+            self._pattern = matcher
+            self._find_best_rank = self._best_rank_pattern
     
     def classify_text(self, text: str) -> str:
-        """Classify text into document category based on keywords."""
-        text_lower = text.lower()
-        
-        for category, keywords in self.categories.items():
-            if any(keyword in text_lower for keyword in keywords):
-                return category
+        """
+        Classify text into document category based on keywords.
         
-        return 'others'
+        When keywords of several categories occur in the text, the category
+        defined first wins.
+        """
+        return self.classify_lowered_text(text.lower())
+    
+    def classify_lowered_text(self, text_lower: str) -> str:
+        """Classify text that is already lowercased, e.g. OCREngine output."""
+        rank = self._find_best_rank(text_lower)
+        return self._category_order[rank] if rank is not None else 'others'
     
     def get_category_keywords(self, category: str) -> list:
         """Get keywords for specific category."""
         return self.categories.get(category, [])
+    
+    @staticmethod
+    def _freeze_keywords(keywords) -> tuple:
+        """Lowercase keywords like the text they match, drop duplicates and put the longest (most specific) first."""
+        unique = dict.fromkeys(keyword.lower() for keyword in keywords)
+        return tuple(sorted(unique, key=len, reverse=True))
+    
+    def _get_shared_matcher(self) -> tuple:
+        """Return (keyword ranks, matcher) for these categories, building them once per process."""
+        with DocumentClassifier._shared_lock:
+            shared = DocumentClassifier._shared_matchers.get(self._frozen)
+            if shared is None:
+                keyword_ranks = self._rank_keywords()
+                
+                # Use the fastest matcher available: Hyperscan, Aho-Corasick, then regex
+                if hyperscan is not None:
+                    matcher = self._build_database(keyword_ranks)
+                elif ahocorasick is not None:
+                    matcher = self._build_automaton(keyword_ranks)
+                else:
+                    matcher = self._build_pattern(keyword_ranks)
+                
+                shared = (keyword_ranks, matcher)
+                DocumentClassifier._shared_matchers[self._frozen] = shared
+        return shared
+    
+    def _rank_keywords(self) -> dict:
+        """Map each keyword to the rank of the first category that lists it."""
+        keyword_ranks = {}
+        for rank, (_, keywords) in enumerate(self._frozen):
+            for keyword in keywords:
+                if keyword:
+                    keyword_ranks.setdefault(keyword, rank)
+        return keyword_ranks
+    
+    @staticmethod
+    def _build_database(keyword_ranks: dict):
+        """Compile all keywords into one Hyperscan database, each tagged with its category rank."""
+        # Keywords are matched as escaped UTF-8 bytes against the lowercased text
+        expressions = [
+            ''.join(f'\\x{byte:02x}' for byte in keyword.encode('utf-8')).encode('ascii')
+            for keyword in keyword_ranks
+        ]
+        database = hyperscan.Database()
+        database.compile(
+            expressions=expressions,
+            ids=list(keyword_ranks.values()),
+            elements=len(expressions),
+            flags=hyperscan.HS_FLAG_SINGLEMATCH,
+        )
+        return database
+    
+    @staticmethod
+    def _build_automaton(keyword_ranks: dict):
+        """Build an Aho-Corasick automaton mapping each keyword to its category rank."""
+        automaton = ahocorasick.Automaton()
+        for keyword, rank in keyword_ranks.items():
+            automaton.add_word(keyword, rank)
+        automaton.make_automaton()
+        return automaton
+    
+    @staticmethod
+    def _build_pattern(keyword_ranks: dict):
+        """Build one regex alternation over all keywords, ordered by category rank."""
+        # A lookahead reports a match at every position, so keywords overlapping
+        # an earlier match are still seen
+        alternation = '|'.join(map(re.escape, keyword_ranks))
+        return re.compile(f'(?=({alternation}))')
+    
+    def _best_rank_hyperscan(self, text_lower: str):
+        """Return the best category rank found by the Hyperscan database, or None."""
+        best = [None]
+        
+        def on_match(rank, start, end, flags, context):
+            if best[0] is None or rank < best[0]:
+                best[0] = rank
+            # Returning True stops the scan once the first category has matched
+            return best[0] == 0
+        
+        try:
+            self._database.scan(text_lower.encode('utf-8'), match_event_handler=on_match,
+                                scratch=self._scratch)
+        except hyperscan.ScanTerminated:
+            pass
+        return best[0]
+    
+    def _best_rank_automaton(self, text_lower: str):
+        """Return the best category rank found by the automaton, or None."""
+        best = None
+        for _, rank in self._automaton.iter(text_lower):
+            if best is None or rank < best:
+                best = rank
+                if best == 0:
+                    break
+        return best
+    
+    def _best_rank_pattern(self, text_lower: str):
+        """Return the best category rank found by the regex fallback, or None."""
+        best = None
+        for match in self._pattern.finditer(text_lower):
+            rank = self._keyword_ranks[match.group(1)]
+            if best is None or rank < best:
+                best = rank
+                if best == 0:
+                    break
+        return best
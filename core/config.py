@@ -3,6 +3,34 @@ import os
 # Upload folder configuration
 UPLOAD_FOLDER = 'uploads'
 
+# PDF rasterization for OCR
+PDF_DPI = 200  # Enough for Tesseract; 300 DPI renders 2.25x more pixels
+
+# Upscaling retry for failed OCR
+UPSCALE_MIN_SIDE = 1500  # Images with a shorter side this large are not upscaled
+UPSCALE_TARGET_SIDE = 1800  # Upscale the shorter side to about this size (at most 2x)
+UPSCALE_MAX_TEXT_HEIGHT = 15  # Text with a median height this large (px) is not upscaled
+
+# OCR input
+OCR_BINARIZE = True  # Adaptive-threshold pages to black and white before Tesseract
+
+# Blank page detection
+BLANK_PAGE_MAX_INK_PIXELS = 20  # Pages with less ink (dark pixels at half size) are not OCR'd
+
+# Orientation detection (Tesseract OSD) before OCR
+OSD_MAX_WIDTH = 800  # Pages are downscaled to this width for detection
+OSD_MIN_CONFIDENCE = 2.0  # Below this, all rotations are tried instead
+
+# Directory scanning
+SCAN_MAX_WORKERS = 16  # Threads listing subdirectories concurrently
+
+# Gemini configuration
+GEMINI_MODEL = 'gemini-1.5-flash'
+GEMINI_BATCH_POLL_INTERVAL = 30  # Seconds between batch job status checks
+GEMINI_MAX_CONCURRENCY = 32  # Maximum in-flight requests in immediate mode
+GEMINI_MAX_RETRIES = 5  # Retries for rate-limited (429) requests
+GEMINI_RETRY_BASE_DELAY = 1.0  # Seconds, doubled after every retry
+
 # Document categories
 CATEGORY_FOLDERS = [
     'invoices', 'ids', 'cheque', 'signature_declaration',
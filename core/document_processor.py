@@ -3,7 +3,8 @@ from .image_processor import ImageProcessor
 from .ocr_engine import OCREngine
 from .classifiers import DocumentClassifier
 from .validators import DocumentIdentifier
-from .file_operations import FileOperations
+from .file_operations import FileOperations, FileEntry
+from .config import UPSCALE_MIN_SIDE, UPSCALE_MAX_TEXT_HEIGHT
 
 
 class DocumentProcessor:
@@ -15,28 +16,36 @@ class DocumentProcessor:
         self.classifier = DocumentClassifier()
         self.image_processor = ImageProcessor()
     
-    def process_document(self, file_path: str, return_id: bool = False):
+    def process_document(self, file_path: str, return_id: bool = False, img=None):
         """
         Process a document file to extract category and identifier.
         
         Args:
             file_path: Path to the document file
             return_id: Whether to return extracted TC/VKN identifier
+            img: Already loaded image of the file (loaded from file_path if None)
             
         Returns:
             tuple: (category, identifier) if return_id=True, else category only
         """
         try:
-            # Load image from file
-            img = self.image_processor.load_image_from_file(file_path)
+            # Load image from file unless it was prefetched
+            if img is None:
+                img = self.image_processor.load_image_from_file(file_path)
             
-            # Try OCR with different rotations
-            category, identifier = self._try_ocr_with_rotations(img)
+            # Blank pages have no text to find
+            if self.image_processor.is_blank_page(img):
+                return ('others', None) if return_id else 'others'
             
-            # If initial OCR failed, try with upscaled image
+            # Try OCR at the detected orientation, or with different rotations
+            detected_angle = self.ocr_engine.detect_orientation(img)
+            seen_texts = set()
+            category, identifier, best_angle = self._try_ocr_with_rotations(img, detected_angle, seen_texts=seen_texts)
+            
+            # If initial OCR failed, try with upscaled image, starting at the
+            # orientation that worked best so far
             if category == 'others':
-                print("Initial OCR failed, retrying with upscaled image...")
-                category, identifier = self._try_ocr_with_upscaling(img)
+                category, identifier = self._try_ocr_with_upscaling(img, detected_angle, best_angle, seen_texts)
                 if category != 'others':
                     print("Success: classified with upscaled image.")
             
@@ -46,55 +55,141 @@ class DocumentProcessor:
             print(f"Error processing document {file_path}: {str(e)}")
             return ('others', None) if return_id else 'others'
     
-    def _try_ocr_with_rotations(self, img):
-        """Try OCR with different image rotations."""
+    def _try_ocr_with_rotations(self, img, detected_angle: int = None, angle_hint: int = None,
+                                seen_texts: set = None):
+        """
+        Try OCR at the detected orientation, or at every rotation if detection failed.
+        
+        Args:
+            img: Image to OCR
+            detected_angle: Orientation found by OSD, the only angle tried if given
+            angle_hint: Angle to try first when trying every rotation
+            seen_texts: OCR texts already classified for this document, to skip repeats
+            
+        Returns:
+            tuple: (category, identifier, best_angle), where best_angle is the
+                angle that classified the page or produced the most text
+        """
+        if detected_angle is not None:
+            try:
+                category, identifier, _ = self._try_ocr_at_angle(img, detected_angle, seen_texts)
+                return category, identifier, detected_angle
+            except Exception:
+                pass
+        
         angles = [0, 90, 180, 270]
+        if angle_hint is not None:
+            angles = [angle_hint] + [angle for angle in angles if angle != angle_hint]
         
+        best_angle, best_length = angles[0], -1
         for angle in angles:
             try:
-                rotated = self.image_processor.rotate_image(img, angle)
-                text = self.ocr_engine.extract_text_from_image(rotated)
+                category, identifier, text_length = self._try_ocr_at_angle(img, angle, seen_texts)
+                if category != 'others':
+                    return category, identifier, angle
                 
-                if text.strip():
-                    identifier = DocumentIdentifier.extract_identifier(text)
-                    category = self.classifier.classify_text(text)
-                    
-                    if category != 'others':
-                        return category, identifier
+                if text_length > best_length:
+                    best_angle, best_length = angle, text_length
                         
             except Exception:
                 continue
         
-        return 'others', None
+        return 'others', None, best_angle
     
-    def _try_ocr_with_upscaling(self, img):
-        """Try OCR with upscaled image."""
+    def _try_ocr_at_angle(self, img, angle: int, seen_texts: set = None):
+        """Run OCR on the image rotated by angle and classify the text; returns (category, identifier, text length)."""
+        rotated = self.image_processor.rotate_image(img, angle)
+        text = self.ocr_engine.extract_text_from_image(rotated)
+        text_length = len(text.strip())
+        
+        # Text identical to an earlier attempt was already classified as 'others'
+        if seen_texts is not None:
+            if text in seen_texts:
+                return 'others', None, text_length
+            seen_texts.add(text)
+        
+        if text_length:
+            identifier = DocumentIdentifier.extract_identifier(text)
+            # OCR output is already lowercased
+            category = self.classifier.classify_lowered_text(text)
+            
+            if category != 'others':
+                return category, identifier, text_length
+        
+        return 'others', None, text_length
+    
+    def _try_ocr_with_upscaling(self, img, detected_angle: int = None, angle_hint: int = None,
+                                seen_texts: set = None):
+        """Try OCR with upscaled image, unless the image or its text is already large enough."""
+        height, width = img.shape[:2]
+        if min(height, width) >= UPSCALE_MIN_SIDE:
+            return 'others', None
+        
+        text_height = self.image_processor.estimate_text_height(img)
+        if text_height is not None and text_height >= UPSCALE_MAX_TEXT_HEIGHT:
+            return 'others', None
+        
+        print("Initial OCR failed, retrying with upscaled image...")
         try:
             upscaled_img = self.image_processor.upscale_image(img)
-            return self._try_ocr_with_rotations(upscaled_img)
+            category, identifier, _ = self._try_ocr_with_rotations(
+                upscaled_img, detected_angle, angle_hint, seen_texts
+            )
+            return category, identifier
         except Exception:
             return 'others', None
     
-    def process_single_file(self, file_path: str, idx: int, total: int) -> tuple:
+    def process_single_file(self, file_path, idx: int, total: int, img=None) -> tuple:
         """
         Process a single file and move it to appropriate category folder.
         
+        Args:
+            file_path: Path to the document file, or its FileEntry
+            idx: Position of the file in the batch (for progress output)
+            total: Number of files in the batch
+            img: Already loaded image of the file (loaded from file_path if None)
+            
         Returns:
             tuple: (category, original_filename)
         """
-        file_name = os.path.basename(file_path)
-        file_root, file_ext = os.path.splitext(file_name)
+        entry = FileEntry.from_path(file_path) if isinstance(file_path, str) else file_path
+        
+        # Reject files that would only fail deep inside the decoder
+        if entry.is_mislabeled:
+            return self.store_error_file(entry, idx, total, "content does not match extension")
         
         try:
             # Get document category and identifier
-            category, detected_id = self.process_document(file_path, return_id=True)
+            category, detected_id = self.process_document(entry.path, return_id=True, img=img)
+        except Exception as e:
+            return self.store_error_file(entry, idx, total, str(e)[:50])
+        
+        return self.store_classified_file(entry, category, detected_id, idx, total)
+    
+    @staticmethod
+    def store_classified_file(entry: FileEntry, category: str, detected_id, idx: int, total: int) -> tuple:
+        """
+        Rename a classified file after its identifier (if any) and move it to its category folder.
+        
+        Args:
+            entry: FileEntry of the classified file
+            category: Detected document category
+            detected_id: Extracted TC/VKN identifier, or None
+            idx: Position of the file in the batch (for progress output)
+            total: Number of files in the batch
             
+        Returns:
+            tuple: (category, original_filename)
+        """
+        file_name = entry.name
+        
+        try:
             # Generate new filename if identifier found
             if detected_id:
                 new_filename = FileOperations.generate_unique_filename(
                     detected_id, 
                     os.path.join("uploads", category),
-                    file_ext[1:]  # Remove the dot
+                    entry.ext[1:]  # Remove the dot
                 )
                 print(f"[{idx}/{total}] {file_name} → {category} (NEW NAME: {new_filename})")
             else:
@@ -102,12 +197,16 @@ class DocumentProcessor:
                 print(f"[{idx}/{total}] {file_name} → {category}")
             
             # Move file to category folder
-            FileOperations.move_file_to_category(file_path, category, new_filename)
+            FileOperations.move_file_to_category(entry.path, category, new_filename)
             return category, file_name
             
         except Exception as e:
-            # Handle error files
-            error_category = "error_files"
-            FileOperations.move_file_to_category(file_path, error_category, file_name)
-            print(f"[{idx}/{total}] {file_name} → {error_category} ❌ {str(e)[:50]}")
-            return error_category, file_name
+            return DocumentProcessor.store_error_file(entry, idx, total, str(e)[:50])
+    
+    @staticmethod
+    def store_error_file(entry: FileEntry, idx: int, total: int, reason: str) -> tuple:
+        """Move a file that could not be processed to the error_files folder."""
+        error_category = "error_files"
+        FileOperations.move_file_to_category(entry.path, error_category, entry.name)
+        print(f"[{idx}/{total}] {entry.name} → {error_category} ❌ {reason}")
+        return error_category, entry.name
@@ -1,26 +1,175 @@
+import errno
 import os
+import re
 import shutil
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass
 from datetime import datetime
-from .config import UPLOAD_FOLDER
+from .config import UPLOAD_FOLDER, SCAN_MAX_WORKERS
+
+# Leading bytes of the file formats the pipeline can decode
+FILE_SIGNATURES = (
+    (b'\xff\xd8\xff', 'jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'%PDF-', 'pdf'),
+    (b'II*\x00', 'tiff'),
+    (b'MM\x00*', 'tiff'),
+    (b'BM', 'bmp'),
+)
+
+# Expected content kind per file extension
+EXTENSION_KINDS = {
+    '.jpg': 'jpeg',
+    '.jpeg': 'jpeg',
+    '.png': 'png',
+    '.pdf': 'pdf',
+    '.tif': 'tiff',
+    '.tiff': 'tiff',
+    '.bmp': 'bmp',
+}
+
+# Counter that _next_free_name appends to a taken name, e.g. the "(3)" in "123_15102026(3).pdf"
+COUNTER_SUFFIX_PATTERN = re.compile(r'\(\d+\)$')
+
+
+@dataclass(frozen=True)
+class FileEntry:
+    """A scanned file with its name parts split once and its content kind sniffed."""
+    
+    path: str
+    name: str
+    root: str
+    ext: str
+    ext_lower: str
+    kind: str = None
+    
+    @classmethod
+    def from_path(cls, path: str, name: str = None, sniff: bool = True) -> 'FileEntry':
+        """
+        Build an entry from a path (and its base name, if already known).
+        
+        Only files with an extension in EXTENSION_KINDS are opened to sniff
+        their kind; others (and all files when sniff is False, for callers
+        that only need names) keep kind None.
+        """
+        if name is None:
+            name = os.path.basename(path)
+        root, ext = os.path.splitext(name)
+        ext_lower = ext.lower()
+        kind = FileOperations.sniff_kind(path) if sniff and ext_lower in EXTENSION_KINDS else None
+        return cls(path, name, root, ext, ext_lower, kind)
+    
+    @property
+    def is_mislabeled(self) -> bool:
+        """
+        Check whether the content cannot be decoded by the loader its extension selects.
+        
+        Files with a known extension but unrecognized content, and PDFs named
+        as images (or the other way round), are rejected. An image saved under
+        another image extension still decodes, so it is accepted.
+        """
+        expected = EXTENSION_KINDS.get(self.ext_lower)
+        if expected is None:
+            return False
+        if self.kind is None:
+            return True
+        return (self.kind == 'pdf') != (expected == 'pdf')
 
 
 class FileOperations:
     """Handles file system operations."""
     
+    # Directory listings by (root path, sniff): (directory mtimes, file entries)
+    _listing_cache = {}
+    
+    # Next "(n)" suffix to try per (folder, base name, extension)
+    _name_counters = {}
+    
+    # Lowercased names in each destination folder, listed once and then kept
+    # up to date in memory as files are moved in
+    _used_names = {}
+    
+    # Device id per directory, to tell whether a move can be a plain rename
+    _device_ids = {}
+    
     @staticmethod
     def generate_unique_filename(code: str, folder: str, ext: str) -> str:
         """Generate a unique filename with date and counter if needed."""
         date_str = datetime.now().strftime("%d%m%Y")
         base_name = f"{code}_{date_str}"
-        filename = f"{base_name}.{ext}"
-        counter = 1
+        return FileOperations._next_free_name(folder, base_name, f".{ext}")
+    
+    @staticmethod
+    def reset_name_cache():
+        """Forget what is known about destination folders, e.g. before a new run."""
+        FileOperations._name_counters.clear()
+        FileOperations._used_names.clear()
+    
+    @staticmethod
+    def _get_used_names(folder: str) -> set:
+        """
+        Return the lowercased names in a destination folder, creating it if needed.
+        
+        The folder is listed once; moves into it update the set, so picking a
+        free name needs no probing. Names are compared
+        lowercased so that case-insensitive file systems never see a clash.
+        """
+        key = os.path.normpath(folder)
+        used = FileOperations._used_names.get(key)
+        if used is None:
+            FileOperations.ensure_directory_exists(folder)
+            with os.scandir(folder) as entries:
+                used = {entry.name.lower() for entry in entries}
+            FileOperations._used_names[key] = used
+        return used
+    
+    @staticmethod
+    def _next_free_name(folder: str, base_name: str, ext: str) -> str:
+        """
+        Return a free name of the form base_name{ext} or base_name(n){ext} in folder.
+        
+        The next counter per name is kept in memory and seeded from the
+        folder's known names, so placing many files under the same name needs
+        no probing of taken names.
+        """
+        used = FileOperations._get_used_names(folder)
+        key = (os.path.normpath(folder), base_name, ext)
+        counter = FileOperations._name_counters.get(key)
+        if counter is None:
+            counter = FileOperations._first_unused_counter(used, base_name, ext)
         
-        while os.path.exists(os.path.join(folder, filename)):
-            filename = f"{base_name}({counter}).{ext}"
+        filename = f"{base_name}({counter}){ext}" if counter else f"{base_name}{ext}"
+        while filename.lower() in used:
             counter += 1
-            
+            filename = f"{base_name}({counter}){ext}"
+        
+        FileOperations._name_counters[key] = counter + 1
         return filename
     
+    @staticmethod
+    def _first_unused_counter(used: set, base_name: str, ext: str) -> int:
+        """Find the counter after the highest one used for a name (0 if the plain name is free)."""
+        if f"{base_name}{ext}".lower() not in used:
+            return 0
+        
+        numbered = re.compile(re.escape(base_name.lower()) + r'\((\d+)\)' + re.escape(ext.lower()))
+        counters = [int(match.group(1)) for match in map(numbered.fullmatch, used) if match]
+        return max(counters, default=0) + 1
+    
+    @staticmethod
+    def sniff_kind(file_path: str):
+        """Detect the file format from its leading bytes; None if unknown or unreadable."""
+        try:
+            with open(file_path, 'rb') as f:
+                header = f.read(12)
+        except OSError:
+            return None
+        
+        for signature, kind in FILE_SIGNATURES:
+            if header.startswith(signature):
+                return kind
+        return None
+    
     @staticmethod
     def ensure_directory_exists(directory_path: str):
         """Create directory if it doesn't exist."""
@@ -30,31 +179,129 @@ class FileOperations:
     def move_file_to_category(source_path: str, category: str, new_filename: str = None) -> str:
         """Move file to appropriate category folder."""
         dest_folder = os.path.join(UPLOAD_FOLDER, category)
-        FileOperations.ensure_directory_exists(dest_folder)
+        used = FileOperations._get_used_names(dest_folder)
         
         if new_filename is None:
             new_filename = os.path.basename(source_path)
         
+        # Handle file conflicts
+        base_name, ext = os.path.splitext(new_filename)
+        if new_filename.lower() in used:
+            new_filename = FileOperations._next_free_name(dest_folder, base_name, ext)
+        
         dest_path = os.path.join(dest_folder, new_filename)
         
-        # Handle file conflicts
+        # The known names are only a fast path; never overwrite a file that
+        # appeared after the folder was listed (another process or run).
+        # Continue the name's own counter rather than appending a second one
         if os.path.exists(dest_path):
-            base_name, ext = os.path.splitext(new_filename)
-            counter = 1
-            while os.path.exists(dest_path):
-                dest_path = os.path.join(dest_folder, f"{base_name}({counter}){ext}")
-                counter += 1
+            base_name = COUNTER_SUFFIX_PATTERN.sub('', base_name)
+        while os.path.exists(dest_path):
+            used.add(new_filename.lower())
+            new_filename = FileOperations._next_free_name(dest_folder, base_name, ext)
+            dest_path = os.path.join(dest_folder, new_filename)
+        
+        # Within one filesystem a single atomic rename is enough
+        source_folder = os.path.dirname(source_path) or '.'
+        if FileOperations._device_id(source_folder) == FileOperations._device_id(dest_folder):
+            try:
+                os.replace(source_path, dest_path)
+            except OSError as e:
+                # Bind mounts of one filesystem share st_dev but still refuse renames between them
+                if e.errno != errno.EXDEV:
+                    raise
+                shutil.move(source_path, dest_path)
+        else:
+            shutil.move(source_path, dest_path)
         
-        shutil.move(source_path, dest_path)
+        used.add(new_filename.lower())
         return dest_path
     
+    @staticmethod
+    def _device_id(folder: str):
+        """Return the (cached) device id of a directory, or None if it cannot be read."""
+        key = os.path.abspath(folder)
+        if key not in FileOperations._device_ids:
+            try:
+                FileOperations._device_ids[key] = os.stat(key).st_dev
+            except OSError:
+                return None
+        return FileOperations._device_ids[key]
+    
     @staticmethod
     def get_all_files_in_directory(directory_path: str) -> list:
         """Recursively get all files in a directory."""
+        # Only paths are needed, so file headers are not read
+        return [entry.path for entry in FileOperations.scan_directory(directory_path, sniff=False)]
+    
+    @staticmethod
+    def scan_directory(directory_path: str, sniff: bool = True) -> list:
+        """
+        Recursively get all files in a directory as FileEntry objects.
+        
+        Listings are cached and reused as long as no directory in the tree
+        has been modified since it was scanned. With sniff=False file kinds
+        are left unset (see FileEntry.from_path).
+        """
+        key = (directory_path, sniff)
+        cached = FileOperations._listing_cache.get(key)
+        if cached is not None and FileOperations._is_listing_current(cached[0]):
+            return list(cached[1])
+        
+        dir_mtimes, all_files = FileOperations._scan_directory_tree(directory_path, sniff)
+        if dir_mtimes:
+            FileOperations._listing_cache[key] = (dir_mtimes, all_files)
+        return list(all_files)
+    
+    @staticmethod
+    def _scan_directory_tree(directory_path: str, sniff: bool = True,
+                             max_workers: int = SCAN_MAX_WORKERS) -> tuple:
+        """Walk a directory tree, listing subdirectories concurrently on a thread pool."""
+        dir_mtimes = []
         all_files = []
-        for root, _, files in os.walk(directory_path):
-            for file in files:
-                file_path = os.path.join(root, file)
-                if os.path.isfile(file_path):  # Ensure it's a file
-                    all_files.append(file_path)
-        return all_files
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = {executor.submit(FileOperations._scan_directory, directory_path, sniff): directory_path}
+            
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    current_dir = pending.pop(future)
+                    listing = future.result()
+                    if listing is None:
+                        continue
+                    
+                    mtime, subdirs, files = listing
+                    dir_mtimes.append((current_dir, mtime))
+                    all_files.extend(files)
+                    
+                    for subdir in subdirs:
+                        pending[executor.submit(FileOperations._scan_directory, subdir, sniff)] = subdir
+        
+        return dir_mtimes, all_files
+    
+    @staticmethod
+    def _scan_directory(directory_path: str, sniff: bool = True):
+        """List a single directory as (mtime, subdirectories, files), or None if unreadable."""
+        subdirs = []
+        files = []
+        try:
+            # Read mtime before listing so changes made during the scan invalidate it
+            mtime = os.stat(directory_path).st_mtime_ns
+            with os.scandir(directory_path) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.is_file():
+                        files.append(FileEntry.from_path(entry.path, entry.name, sniff))
+        except OSError:
+            return None
+        return mtime, subdirs, files
+    
+    @staticmethod
+    def _is_listing_current(dir_mtimes: list) -> bool:
+        """Check that no scanned directory has been modified since it was listed."""
+        try:
+            return all(os.stat(path).st_mtime_ns == mtime for path, mtime in dir_mtimes)
+        except OSError:
+            return False
@@ -1,9 +1,32 @@
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+import asyncio
 import json
 import base64
+import mimetypes
+import re
+import tempfile
+import time
 from PIL import Image
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import os
+from .config import (
+    GEMINI_MODEL, GEMINI_BATCH_POLL_INTERVAL, GEMINI_MAX_RETRIES, GEMINI_RETRY_BASE_DELAY
+)
+
+try:
+    from orjson import loads as json_loads
+except ImportError:  # Optional dependency, fall back to the standard library parser
+    json_loads = json.loads
+
+
+# Markdown code fence around a JSON response (closing fence optional)
+CODE_FENCE_PATTERN = re.compile(r'^\s*```(?:json)?\s*(.*?)\s*(?:```)?\s*$', re.DOTALL)
+
+# Batch job states after which polling stops
+BATCH_DONE_STATES = {
+    'JOB_STATE_SUCCEEDED', 'JOB_STATE_FAILED', 'JOB_STATE_CANCELLED', 'JOB_STATE_EXPIRED'
+}
 
 
 class GeminiChequeExtractor:
@@ -18,7 +41,8 @@ class GeminiChequeExtractor:
             raise ValueError("Gemini API key is required. Set GEMINI_API_KEY environment variable or pass api_key parameter.")
         
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
+        self.api_key = api_key
+        self.model = genai.GenerativeModel(GEMINI_MODEL)
     
     def extract_cheque_info(self, image_path: str) -> Dict[str, Any]:
         """
@@ -50,7 +74,179 @@ class GeminiChequeExtractor:
             
         except Exception as e:
             print(f"Error extracting info from {image_path}: {str(e)}")
-            return self._create_null_response(os.path.basename(image_path))
+            return self.create_null_response(os.path.basename(image_path))
+    
+    async def extract_cheque_info_async(self, image_path: str,
+                                        max_retries: int = GEMINI_MAX_RETRIES,
+                                        return_exceptions: bool = False) -> Dict[str, Any]:
+        """
+        Extract cheque information from image using Gemini without blocking the event loop.
+        
+        Rate-limited requests (HTTP 429) are retried with exponential backoff.
+        
+        Args:
+            image_path (str): Path to the cheque image
+            max_retries (int): Maximum number of retries for rate-limited requests
+            return_exceptions (bool): Return the error instead of an all-null
+                result when extraction fails
+            
+        Returns:
+            dict: Extracted cheque information (or the exception on failure
+            when return_exceptions is set)
+        """
+        try:
+            # Decode image in a worker thread so other requests keep running
+            loop = asyncio.get_running_loop()
+            image = await loop.run_in_executor(None, self._load_image, image_path)
+            
+            # Create prompt for Gemini
+            prompt = self._create_extraction_prompt()
+            
+            # Generate content with Gemini, backing off while rate limited
+            for attempt in range(max_retries + 1):
+                try:
+                    response = await self.model.generate_content_async([prompt, image])
+                    break
+                except google_exceptions.ResourceExhausted:
+                    if attempt == max_retries:
+                        raise
+                    await asyncio.sleep(GEMINI_RETRY_BASE_DELAY * 2 ** attempt)
+            
+            # Parse JSON response
+            extracted_info = self._parse_response(response.text, raise_errors=return_exceptions)
+            
+            # Add filename to result
+            extracted_info['fileName'] = os.path.basename(image_path)
+            
+            return extracted_info
+            
+        except Exception as e:
+            print(f"Error extracting info from {image_path}: {str(e)}")
+            if return_exceptions:
+                return e
+            return self.create_null_response(os.path.basename(image_path))
+    
+    def build_batch_request(self, image_path: str) -> Dict[str, Any]:
+        """
+        Build a Gemini Batch Mode request line for a cheque image.
+        
+        Args:
+            image_path (str): Path to the cheque image
+            
+        Returns:
+            dict: Batch request keyed by the image path
+        """
+        with open(image_path, 'rb') as f:
+            image_data = base64.b64encode(f.read()).decode('ascii')
+        
+        mime_type = mimetypes.guess_type(image_path)[0] or 'image/jpeg'
+        
+        return {
+            'key': image_path,
+            'request': {
+                'contents': [{
+                    'parts': [
+                        {'text': self._create_extraction_prompt()},
+                        {'inline_data': {'mime_type': mime_type, 'data': image_data}}
+                    ]
+                }]
+            }
+        }
+    
+    def extract_cheque_info_batch(self, image_paths: List[str],
+                                  poll_interval: int = GEMINI_BATCH_POLL_INTERVAL,
+                                  return_exceptions: bool = False) -> List[Dict[str, Any]]:
+        """
+        Extract cheque information from many images with a single Gemini batch job.
+        
+        Batch jobs are billed at a reduced rate but may take up to 24 hours to
+        complete, so this call blocks until the job finishes.
+        
+        Args:
+            image_paths (List[str]): Paths to the cheque images
+            poll_interval (int): Seconds to wait between job status checks
+            return_exceptions (bool): Put the error in place of an all-null
+                result for images whose request failed
+            
+        Returns:
+            List[Dict]: Extracted cheque information, in the order of image_paths
+        """
+        # The Batch API is only available in the google-genai SDK
+        from google import genai as genai_sdk
+        
+        client = genai_sdk.Client(api_key=self.api_key)
+        
+        # Write all requests to a JSONL file and upload it
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', encoding='utf-8', delete=False) as f:
+            for image_path in image_paths:
+                f.write(json.dumps(self.build_batch_request(image_path)) + '\n')
+            jsonl_path = f.name
+        
+        try:
+            uploaded = client.files.upload(file=jsonl_path, config={'mime_type': 'jsonl'})
+        finally:
+            os.remove(jsonl_path)
+        
+        job = client.batches.create(model=GEMINI_MODEL, src=uploaded.name)
+        print(f"Submitted Gemini batch job: {job.name}")
+        
+        while job.state.name not in BATCH_DONE_STATES:
+            time.sleep(poll_interval)
+            job = client.batches.get(name=job.name)
+        
+        if job.state.name != 'JOB_STATE_SUCCEEDED':
+            raise RuntimeError(f"Gemini batch job {job.name} finished with state {job.state.name}")
+        
+        response_texts = self._read_batch_responses(client, job)
+        
+        results = []
+        for image_path in image_paths:
+            filename = os.path.basename(image_path)
+            response_text = response_texts.get(image_path)
+            
+            if response_text is None:
+                print(f"No batch response for {image_path}")
+                if return_exceptions:
+                    results.append(RuntimeError(f"No batch response for {image_path}"))
+                else:
+                    results.append(self.create_null_response(filename))
+                continue
+            
+            try:
+                extracted_info = self._parse_response(response_text, raise_errors=return_exceptions)
+            except Exception as e:
+                results.append(e)
+                continue
+            extracted_info['fileName'] = filename
+            results.append(extracted_info)
+        
+        return results
+    
+    def _read_batch_responses(self, client, job) -> Dict[str, Optional[str]]:
+        """Download batch job results and map each request key to its response text."""
+        content = client.files.download(file=job.dest.file_name).decode('utf-8')
+        
+        response_texts = {}
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            
+            item = json_loads(line)
+            try:
+                parts = item['response']['candidates'][0]['content']['parts']
+                response_texts[item['key']] = ''.join(part.get('text', '') for part in parts)
+            except (KeyError, IndexError, TypeError):
+                print(f"Batch request {item.get('key')} failed: {item.get('error')}")
+                response_texts[item.get('key')] = None
+        
+        return response_texts
+    
+    @staticmethod
+    def _load_image(image_path: str) -> Image.Image:
+        """Open and fully decode an image file."""
+        image = Image.open(image_path)
+        image.load()
+        return image
     
     def _create_extraction_prompt(self) -> str:
         """Create the prompt for Gemini to extract cheque information."""
@@ -82,24 +278,15 @@ Lütfen sadece JSON formatında yanıt ver, başka açıklama ekleme:
 }
 """
     
-    def _parse_response(self, response_text: str) -> Dict[str, Any]:
-        """Parse Gemini response and extract JSON."""
+    def _parse_response(self, response_text: str, raise_errors: bool = False) -> Dict[str, Any]:
+        """Parse Gemini response and extract JSON, re-raising parse errors if raise_errors is set."""
         try:
-            # Clean the response text
-            cleaned_text = response_text.strip()
-            
             # Remove markdown code blocks if present
-            if cleaned_text.startswith('```json'):
-                cleaned_text = cleaned_text[7:]
-            if cleaned_text.startswith('```'):
-                cleaned_text = cleaned_text[3:]
-            if cleaned_text.endswith('```'):
-                cleaned_text = cleaned_text[:-3]
-            
-            cleaned_text = cleaned_text.strip()
+            match = CODE_FENCE_PATTERN.match(response_text)
+            cleaned_text = match.group(1) if match else response_text.strip()
             
             # Parse JSON
-            result = json.loads(cleaned_text)
+            result = json_loads(cleaned_text)
             
             # Ensure all required fields exist
             required_fields = [
@@ -116,9 +303,11 @@ Lütfen sadece JSON formatında yanıt ver, başka açıklama ekleme:
         except Exception as e:
             print(f"Error parsing Gemini response: {str(e)}")
             print(f"Response text: {response_text}")
-            return self._create_null_response()
+            if raise_errors:
+                raise
+            return self.create_null_response()
     
-    def _create_null_response(self, filename: str = None) -> Dict[str, Any]:
+    def create_null_response(self, filename: str = None) -> Dict[str, Any]:
         """Create a response with all null values."""
         return {
             'fileName': filename,
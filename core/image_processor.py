@@ -1,7 +1,11 @@
 import cv2
+import numpy as np
 import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
 from pdf2image import convert_from_path
+from .config import PDF_DPI, UPSCALE_TARGET_SIDE, BLANK_PAGE_MAX_INK_PIXELS
 
 
 class ImageProcessor:
@@ -25,49 +29,176 @@ class ImageProcessor:
         return cv2.rotate(image_cv2, rotation_map[angle])
     
     @staticmethod
-    def upscale_image(image_cv2, scale_factor: float = 2.0):
-        """Upscale image for better OCR results."""
+    def upscale_image(image_cv2, scale_factor: float = None, interpolation: int = cv2.INTER_LINEAR):
+        """
+        Upscale image for better OCR results.
+        
+        By default the shorter side is scaled up towards UPSCALE_TARGET_SIDE,
+        at most 2x, since Tesseract gains nothing from larger images.
+        """
+        if scale_factor is None:
+            height, width = image_cv2.shape[:2]
+            scale_factor = min(2.0, max(1.0, UPSCALE_TARGET_SIDE / min(height, width)))
+        
         return cv2.resize(
             image_cv2, 
             None, 
             fx=scale_factor, 
             fy=scale_factor, 
-            interpolation=cv2.INTER_CUBIC
+            interpolation=interpolation
         )
     
     @staticmethod
-    def load_image_from_file(file_path: str):
-        """Load image from file, handling both PDF and image formats."""
+    def is_blank_page(image_cv2, max_ink_pixels: int = BLANK_PAGE_MAX_INK_PIXELS) -> bool:
+        """
+        Check whether a page carries (almost) no ink, e.g. a blank separator or cover page.
+        
+        Dark marks are found with an adaptive threshold on a half-size copy,
+        so uneven lighting and scanner noise do not count as ink; marks less
+        than 2 pixels tall are ignored. A single short word already leaves
+        far more than max_ink_pixels.
+        """
+        gray = ImageProcessor._to_gray(image_cv2)
+        height, width = gray.shape
+        small = cv2.resize(gray, (max(1, width // 2), max(1, height // 2)), interpolation=cv2.INTER_AREA)
+        marks = ImageProcessor._dark_marks(small, block_size=15)
+        ink = marks[marks[:, cv2.CC_STAT_HEIGHT] >= 2, cv2.CC_STAT_AREA].sum()
+        return ink <= max_ink_pixels
+    
+    @staticmethod
+    def binarize(image_cv2, block_size: int = 31, offset: int = 10):
+        """
+        Convert an image to black and white with a Gaussian adaptive threshold.
+        
+        Adapts to uneven lighting on scans and photos, and leaves Tesseract
+        a single-channel image with no binarization of its own to do.
+        """
+        gray = ImageProcessor._to_gray(image_cv2)
+        return cv2.adaptiveThreshold(
+            gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, block_size, offset
+        )
+    
+    @staticmethod
+    def estimate_text_height(image_cv2, min_height: int = 3):
+        """
+        Estimate the median height in pixels of the text on a page.
+        
+        Dark blobs are found with an adaptive threshold; blobs shorter than
+        min_height (noise) are ignored. Returns None if no blobs are found.
+        """
+        marks = ImageProcessor._dark_marks(ImageProcessor._to_gray(image_cv2))
+        heights = marks[:, cv2.CC_STAT_HEIGHT]
+        heights = heights[heights >= min_height]
+        return float(np.median(heights)) if heights.size else None
+    
+    @staticmethod
+    def _to_gray(image_cv2):
+        """Return a single-channel copy of a BGR image, or the image itself if already grayscale."""
+        return image_cv2 if image_cv2.ndim == 2 else cv2.cvtColor(image_cv2, cv2.COLOR_BGR2GRAY)
+    
+    @staticmethod
+    def _dark_marks(gray, block_size: int = 31, offset: int = 10):
+        """Find dark blobs with a mean adaptive threshold; returns their connectedComponentsWithStats rows."""
+        binary = cv2.adaptiveThreshold(
+            gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, block_size, offset
+        )
+        _, _, stats, _ = cv2.connectedComponentsWithStats(binary)
+        
+        # Row 0 is the background
+        return stats[1:]
+    
+    @staticmethod
+    def load_image_from_file(file_path: str, dpi: int = PDF_DPI, grayscale: bool = True):
+        """
+        Load image from file, handling both PDF and image formats.
+        
+        Args:
+            file_path: Path to the PDF or image file
+            dpi: Resolution used to render PDF pages
+            grayscale: Load as a single-channel image (pass False for callers
+                that need color, e.g. dpi=300, grayscale=False)
+        """
         _, ext = os.path.splitext(file_path)
         
         if ext.lower() == ".pdf":
-            return ImageProcessor._load_from_pdf(file_path)
+            return ImageProcessor._load_from_pdf(file_path, dpi, grayscale)
         else:
-            return ImageProcessor._load_from_image(file_path)
+            return ImageProcessor._load_from_image(file_path, grayscale)
+    
+    @staticmethod
+    def load_images_batch(paths, workers: int = None, dpi: int = PDF_DPI, grayscale: bool = True):
+        """
+        Load many files concurrently, yielding (path, image) in input order.
+        
+        Loads run on threads: pdf2image renders PDFs in a pdftoppm subprocess
+        and cv2.imread releases the GIL, so neither needs a process of its
+        own. At most 2 * workers files are in flight, so memory stays
+        bounded. The image is None for files that could not be loaded.
+        
+        Args:
+            paths: File paths to load
+            workers: Number of worker threads (defaults to CPU count)
+            dpi: Resolution used to render PDF pages
+            grayscale: Load files as single-channel images
+        """
+        workers = workers or os.cpu_count() or 1
+        thread_pool = ThreadPoolExecutor(max_workers=workers)
+        pending = deque()
+        
+        try:
+            for path in paths:
+                if os.path.splitext(path)[1].lower() == ".pdf":
+                    future = thread_pool.submit(ImageProcessor._load_from_pdf, path, dpi, grayscale)
+                else:
+                    future = thread_pool.submit(ImageProcessor._load_from_image, path, grayscale)
+                pending.append((path, future))
+                
+                if len(pending) >= 2 * workers:
+                    yield ImageProcessor._batch_result(*pending.popleft())
+            
+            while pending:
+                yield ImageProcessor._batch_result(*pending.popleft())
+        finally:
+            # Drop queued work if the consumer stopped early
+            for _, future in pending:
+                future.cancel()
+            thread_pool.shutdown()
     
     @staticmethod
-    def _load_from_pdf(file_path: str):
+    def _batch_result(path: str, future) -> tuple:
+        """Wait for a batch load and return (path, image), with None on failure."""
+        try:
+            return path, future.result()
+        except Exception:
+            return path, None
+    
+    @staticmethod
+    def _load_from_pdf(file_path: str, dpi: int = PDF_DPI, grayscale: bool = True):
         """Load first page from PDF as OpenCV image."""
-        pages = convert_from_path(file_path, dpi=300)
-        pil_image = pages[0]
+        # Only render the page we use
+        pages = convert_from_path(
+            file_path, dpi=dpi, grayscale=grayscale, first_page=1, last_page=1
+        )
+        page = np.asarray(pages[0])
         
-        # Convert PIL to OpenCV format
-        temp_path = "temp_image.jpg"
-        pil_image.save(temp_path)
-        img = cv2.imread(temp_path)
-        os.remove(temp_path)
+        if grayscale:
+            return page
         
-        return img
+        # Convert PIL (RGB) to OpenCV (BGR) in memory
+        return cv2.cvtColor(page, cv2.COLOR_RGB2BGR)
     
     @staticmethod
-    def _load_from_image(file_path: str):
+    def _load_from_image(file_path: str, grayscale: bool = True):
         """Load image file as OpenCV image."""
-        img = cv2.imread(file_path)
+        # Decoding straight to grayscale skips a color conversion before OCR
+        img = cv2.imread(file_path, cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR)
         if img is None:
             raise ValueError(f"Could not load image from: {file_path}")
         return img
     
     @staticmethod
     def convert_cv2_to_pil(img_cv2):
-        """Convert OpenCV image to PIL Image."""
+        """Convert OpenCV image (BGR or grayscale) to PIL Image."""
+        if img_cv2.ndim == 2:
+            return Image.fromarray(img_cv2)
         return Image.fromarray(cv2.cvtColor(img_cv2, cv2.COLOR_BGR2RGB))
@@ -1,25 +1,174 @@
+import re
+import cv2
 import pytesseract
+from typing import Optional
 from .image_processor import ImageProcessor
+from .config import OCR_BINARIZE, OSD_MAX_WIDTH, OSD_MIN_CONFIDENCE
+
+try:
+    import tesserocr
+except ImportError:  # Optional dependency, fall back to the tesseract CLI via pytesseract
+    tesserocr = None
+
+
+# Clockwise rotation reported by Tesseract orientation detection
+OSD_ROTATE_PATTERN = re.compile(r'Rotate: (\d+)')
+OSD_CONFIDENCE_PATTERN = re.compile(r'Orientation confidence: ([\d.]+)')
+
+# Tesseract CLI options that map onto tesserocr API arguments
+API_CONFIG_OPTION_PATTERN = re.compile(r'--(oem|psm)\s+(\d+)')
 
 
 class OCREngine:
-    """Handles OCR text extraction from images."""
+    """
+    Handles OCR text extraction from images.
     
-    def __init__(self, language: str = 'tur', config: str = '--oem 3 --psm 6'):
+    When tesserocr is installed, one Tesseract API instance is kept in-process
+    and reused for every call instead of starting a tesseract process (and
+    reloading the language model) per image; orientation detection uses a
+    second, OSD-only instance. The API is not thread-safe, so use one engine
+    per thread, and close() it (or use the engine as a context manager) when
+    done.
+    """
+    
+    def __init__(self, language: str = 'tur', config: str = '--oem 3 --psm 6', binarize: bool = OCR_BINARIZE):
         """Initialize OCR engine with configuration."""
         self.language = language
         self.config = config
+        self.binarize = binarize
+        self._api = None
+        self._osd_api = None
+        self._osd_api_failed = False
+        self._api_options = self._parse_api_options(config) if tesserocr else None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        """Release the in-process Tesseract APIs, if any were created."""
+        if self._api is not None:
+            self._api.End()
+            self._api = None
+        if self._osd_api is not None:
+            self._osd_api.End()
+            self._osd_api = None
     
     def extract_text_from_image(self, img_cv2) -> str:
         """Extract text from OpenCV image using Tesseract OCR."""
-        pil_img = ImageProcessor.convert_cv2_to_pil(img_cv2)
-        text = pytesseract.image_to_string(
-            pil_img, 
-            config=self.config, 
-            lang=self.language
-        )
+        if self.binarize:
+            img_cv2 = ImageProcessor.binarize(img_cv2)
+        
+        if self._api_options is not None:
+            api = self._get_api()
+            self._set_api_image(api, img_cv2)
+            text = api.GetUTF8Text()
+        else:
+            pil_img = ImageProcessor.convert_cv2_to_pil(img_cv2)
+            text = pytesseract.image_to_string(
+                pil_img, 
+                config=self.config, 
+                lang=self.language
+            )
         return text.lower()
     
+    @staticmethod
+    def _set_api_image(api, img_cv2):
+        """Hand a grayscale or BGR array to tesserocr as raw pixels, without PIL."""
+        if img_cv2.ndim == 3:
+            img_cv2 = cv2.cvtColor(img_cv2, cv2.COLOR_BGR2RGB)
+        
+        height, width = img_cv2.shape[:2]
+        channels = 1 if img_cv2.ndim == 2 else img_cv2.shape[2]
+        api.SetImageBytes(img_cv2.tobytes(), width, height, channels, width * channels)
+    
+    def _get_api(self):
+        """Create the tesserocr API on first use, loading the language model once."""
+        if self._api is None:
+            self._api = tesserocr.PyTessBaseAPI(lang=self.language, **self._api_options)
+        return self._api
+    
+    def _get_osd_api(self):
+        """Create the OSD-only tesserocr API on first use."""
+        if self._osd_api is None:
+            self._osd_api = tesserocr.PyTessBaseAPI(lang='osd', psm=tesserocr.PSM.OSD_ONLY)
+        return self._osd_api
+    
+    @staticmethod
+    def _parse_api_options(config: str) -> Optional[dict]:
+        """Translate a Tesseract CLI config into tesserocr arguments, or None if unsupported."""
+        if API_CONFIG_OPTION_PATTERN.sub('', config).strip():
+            # Other CLI flags have no tesserocr equivalent, keep using pytesseract
+            return None
+        return {name: int(value) for name, value in API_CONFIG_OPTION_PATTERN.findall(config)}
+    
+    def detect_orientation(self, img_cv2) -> Optional[int]:
+        """
+        Detect page orientation with Tesseract OSD (--psm 0).
+        
+        Detection runs on a copy downscaled to OSD_MAX_WIDTH, and results with
+        a confidence below OSD_MIN_CONFIDENCE are discarded.
+        
+        Returns:
+            int: Clockwise rotation (0, 90, 180, 270) that makes the page
+                upright, or None if orientation could not be detected reliably
+        """
+        small = self._downscale_for_osd(img_cv2)
+        if self._api_options is not None:
+            return self._detect_orientation_api(small)
+        
+        pil_img = ImageProcessor.convert_cv2_to_pil(small)
+        try:
+            osd = pytesseract.image_to_osd(pil_img, config='--psm 0')
+        except pytesseract.TesseractError:
+            # Blank pages or too little text to decide
+            return None
+        
+        rotate = OSD_ROTATE_PATTERN.search(osd)
+        confidence = OSD_CONFIDENCE_PATTERN.search(osd)
+        if not rotate or not confidence or float(confidence.group(1)) < OSD_MIN_CONFIDENCE:
+            return None
+        return int(rotate.group(1))
+    
+    def _detect_orientation_api(self, img_cv2) -> Optional[int]:
+        """Detect page orientation in-process with tesserocr instead of a tesseract run."""
+        if self._osd_api_failed:
+            return None
+        
+        try:
+            api = self._get_osd_api()
+        except Exception as e:
+            # Usually a missing osd.traineddata; it will not appear mid-run, so don't retry
+            print(f"Orientation detection disabled, OSD model could not be loaded: {e}")
+            self._osd_api_failed = True
+            return None
+        
+        try:
+            self._set_api_image(api, img_cv2)
+            osd = api.DetectOrientationScript()
+        except Exception:
+            # Treat like the CLI failing on a page with too little text
+            return None
+        
+        if not osd or osd['orient_conf'] < OSD_MIN_CONFIDENCE:
+            return None
+        
+        # orient_deg is the page's counter-clockwise orientation; the CLI's
+        # "Rotate" value is the clockwise rotation that undoes it
+        return (360 - osd['orient_deg']) % 360
+    
+    @staticmethod
+    def _downscale_for_osd(img_cv2):
+        """Shrink the page to OSD_MAX_WIDTH; orientation does not need full resolution."""
+        height, width = img_cv2.shape[:2]
+        if width <= OSD_MAX_WIDTH:
+            return img_cv2
+        
+        new_height = max(1, height * OSD_MAX_WIDTH // width)
+        return cv2.resize(img_cv2, (OSD_MAX_WIDTH, new_height), interpolation=cv2.INTER_AREA)
+    
     def extract_text_with_rotation(self, img_cv2) -> str:
         """Try OCR with different rotations to find best result."""
         angles = [0, 90, 180, 270]
@@ -0,0 +1,88 @@
+import queue
+import threading
+from typing import Callable, Iterable
+from .image_processor import ImageProcessor
+
+
+class PrefetchReader:
+    """
+    Iterate over files while a background thread loads the next ones.
+    
+    Decoding upcoming files overlaps with OCR/classification of the current
+    one. By default files are decoded concurrently with
+    ImageProcessor.load_images_batch; a custom loader is called sequentially.
+    Yields (path, image) tuples in input order; image is None when loading
+    failed, so the consumer can reload the file and handle the error itself.
+    """
+    
+    _DONE = object()
+    
+    def __init__(self, paths: Iterable[str], queue_size: int = 4, loader: Callable = None,
+                 workers: int = None):
+        """Initialize reader with file paths and the bounded prefetch queue size."""
+        self.paths = list(paths)
+        self.loader = loader
+        self.queue_size = queue_size
+        self.workers = workers
+    
+    def __len__(self) -> int:
+        return len(self.paths)
+    
+    def __iter__(self):
+        loaded = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        threading.Thread(target=self._run, args=(loaded, stop), daemon=True).start()
+        
+        try:
+            while True:
+                item = loaded.get()
+                if item is self._DONE:
+                    return
+                if isinstance(item, Exception):
+                    # The loader thread failed; surface its error here
+                    raise item
+                yield item
+        finally:
+            # Let the loader thread exit if the consumer stops early
+            stop.set()
+    
+    def _run(self, loaded: queue.Queue, stop: threading.Event):
+        """Load every file and push the results onto the queue, ending with _DONE or the error."""
+        items = None
+        last = self._DONE
+        try:
+            items = self._load_all()
+            for item in items:
+                if stop.is_set():
+                    return
+                self._put(loaded, stop, item)
+        except Exception as e:
+            last = e
+        finally:
+            if items is not None:
+                items.close()
+            # Always end the queue so the consumer never waits forever
+            self._put(loaded, stop, last)
+    
+    def _load_all(self):
+        """Yield (path, image) pairs for every file."""
+        if self.loader is None:
+            yield from ImageProcessor.load_images_batch(self.paths, self.workers)
+            return
+        
+        for path in self.paths:
+            try:
+                img = self.loader(path)
+            except Exception:
+                img = None
+            yield path, img
+    
+    @staticmethod
+    def _put(loaded: queue.Queue, stop: threading.Event, item):
+        """Put item on the queue, giving up once the consumer has stopped."""
+        while not stop.is_set():
+            try:
+                loaded.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
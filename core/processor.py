@@ -1,31 +1,103 @@
 import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import chain
 from .config import UPLOAD_FOLDER, CATEGORY_FOLDERS
 from .utils import normalize_filename, print_results
-from .file_operations import FileOperations
+from .file_operations import FileOperations, FileEntry
 from .document_processor import DocumentProcessor
+from .prefetch import PrefetchReader
 
-def process_single_file(file_path, idx, total):
-    """Process a single file and return the result."""
-    file_name = normalize_filename(os.path.basename(file_path))
+# One DocumentProcessor (and OCR engine) per thread, reused across files
+_thread_local = threading.local()
+
+def get_doc_processor():
+    """Return this thread's DocumentProcessor, creating it on first use."""
+    doc_processor = getattr(_thread_local, 'doc_processor', None)
+    if doc_processor is None:
+        doc_processor = DocumentProcessor()
+        _thread_local.doc_processor = doc_processor
+    return doc_processor
+
+def process_single_file(file_path, idx, total, img=None):
+    """Process a single file (path or FileEntry) and return the result."""
+    entry = FileEntry.from_path(file_path) if isinstance(file_path, str) else file_path
+    file_name = normalize_filename(entry.name)
     
-    # Initialize document processor
-    doc_processor = DocumentProcessor()
+    # Reuse the document processor across files
+    doc_processor = get_doc_processor()
     
     # Process the file
-    category, original_filename = doc_processor.process_single_file(file_path, idx, total)
+    category, original_filename = doc_processor.process_single_file(entry, idx, total, img=img)
     
     return category, original_filename
 
-def process_files_in_directory(directory_path):
-    """Process all files in the given directory."""
+def _init_worker():
+    """Limit each worker process to one OCR thread, since workers already run in parallel."""
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+
+def _classify_file(file_path):
+    """Load, OCR and classify a file in a worker process; returns (category, identifier)."""
+    return get_doc_processor().process_document(file_path, return_id=True)
+
+def _process_sequentially(entries, start, total, max_workers):
+    """Process files in this process, loading the next ones in the background with max_workers loaders."""
+    reader = PrefetchReader((entry.path for entry in entries), workers=max_workers)
+    for idx, (entry, (_, img)) in enumerate(zip(entries, reader), start=start):
+        yield process_single_file(entry, idx, total, img=img)
+
+def _process_in_workers(entries, start, total, max_workers):
+    """
+    Classify files in worker processes; rename and move them here, in input order.
+    
+    If a worker process dies (e.g. out of memory), the pool is unusable and
+    processing stops; files not yet classified stay in the input folder.
+    """
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as executor:
+        futures = [executor.submit(_classify_file, entry.path) for entry in entries]
+        for idx, (entry, future) in enumerate(zip(entries, futures), start=start):
+            try:
+                category, detected_id = future.result()
+            except BrokenProcessPool as e:
+                remaining = len(entries) - (idx - start)
+                print(f"A worker process died ({e}); stopping with {remaining} files left unprocessed.")
+                return
+            except Exception as e:
+                yield DocumentProcessor.store_error_file(entry, idx, total, str(e)[:50])
+                continue
+            yield DocumentProcessor.store_classified_file(entry, category, detected_id, idx, total)
+
+def process_files_in_directory(directory_path, max_workers=None):
+    """
+    Process all files in the given directory.
+    
+    Files are OCR'd and classified in max_workers processes (defaults to the
+    CPU count), while renaming and moving stays in this process. With
+    max_workers=1 files are processed here instead.
+    """
     results = []
     folder_counts = {folder: 0 for folder in CATEGORY_FOLDERS}
+    max_workers = max_workers or os.cpu_count() or 1
 
-    all_files = FileOperations.get_all_files_in_directory(directory_path)
+    all_files = FileOperations.scan_directory(directory_path)
     total = len(all_files)
 
-    for idx, file_path in enumerate(all_files, start=1):
-        category, file_name = process_single_file(file_path, idx, total)
+    # Destination folders are listed afresh once per run
+    FileOperations.reset_name_cache()
+
+    # Files whose content does not match their extension go to error_files without decoding
+    rejected = [entry for entry in all_files if entry.is_mislabeled]
+    readable = [entry for entry in all_files if not entry.is_mislabeled]
+
+    outcomes = [process_single_file(entry, idx, total) for idx, entry in enumerate(rejected, start=1)]
+    start = len(rejected) + 1
+    if max_workers > 1 and len(readable) > 1:
+        processed = _process_in_workers(readable, start, total, max_workers)
+    else:
+        processed = _process_sequentially(readable, start, total, max_workers)
+
+    for category, file_name in chain(outcomes, processed):
         folder_counts[category] += 1
         results.append((file_name, category))
 
@@ -1,39 +1,60 @@
 import re
+from functools import lru_cache
+
+# Validation results per digit string; validators are pure and IDs recur across a batch
+_VALIDATION_CACHE_SIZE = 8192
+
+# Compiled once instead of looking the patterns up in the re cache on every call
+_TC_FIND = re.compile(r'\b\d{11}\b')
+_VKN_FIND = re.compile(r'\b\d{10}\b')
+_ID_FIND = re.compile(r'\b\d{10,11}\b')
+
+# Weights 2 ** (9 - i) of the first nine VKN digits, reduced mod 9 since
+# every weighted term is taken mod 9 anyway
+_VKN_POW_MOD9 = tuple(2 ** (9 - i) % 9 for i in range(9))
+
+
+def _is_repeated_digit(candidate: str) -> bool:
+    """Check for one digit repeated, usually an OCR'd dotted line rather than an ID."""
+    return candidate == candidate[0] * len(candidate)
 
 
 class TCValidator:
     """Turkish Republic ID number validator."""
     
     @staticmethod
+    @lru_cache(maxsize=_VALIDATION_CACHE_SIZE)
     def is_valid_tc(tc: str) -> bool:
         """Validate Turkish Republic ID number according to official algorithm."""
-        if not re.fullmatch(r'\d{11}', tc):
+        if not (len(tc) == 11 and tc.isascii() and tc.isdigit()):
             return False
-            
-        digits = list(map(int, tc))
+        
+        # Work on the ASCII codes directly; a digit's value is its code - 48
+        d0, d1, d2, d3, d4, d5, d6, d7, d8, d9, d10 = tc.encode()
         
         # First digit cannot be 0
-        if digits[0] == 0:
+        if d0 == 48:
             return False
             
         # Sum of first 10 digits mod 10 should equal 11th digit
-        if sum(digits[:10]) % 10 != digits[10]:
+        if (d0 + d1 + d2 + d3 + d4 + d5 + d6 + d7 + d8 + d9 - 10 * 48) % 10 != d10 - 48:
             return False
             
         # Complex validation algorithm
-        odd_sum = sum(digits[0:10:2])  # 1st, 3rd, 5th, 7th, 9th digits
-        even_sum = sum(digits[1:9:2])  # 2nd, 4th, 6th, 8th digits
+        odd_sum = d0 + d2 + d4 + d6 + d8 - 5 * 48  # 1st, 3rd, 5th, 7th, 9th digits
+        even_sum = d1 + d3 + d5 + d7 - 4 * 48  # 2nd, 4th, 6th, 8th digits
         
-        if ((odd_sum * 7) - even_sum) % 10 != digits[9]:
-            return False
-            
-        return True
+        return ((odd_sum * 7) - even_sum) % 10 == d9 - 48
     
     @staticmethod
     def extract_tc_from_text(text: str) -> str:
         """Extract valid TC number from text."""
-        matches = re.findall(r'\b\d{11}\b', text)
-        for match in matches:
+        # Stop scanning at the first valid number instead of collecting all matches
+        for found in _TC_FIND.finditer(text):
+            match = found.group()
+            # Cheap rejections before the checksum: a TC never starts with 0
+            if match[0] == '0' or _is_repeated_digit(match):
+                continue
             if TCValidator.is_valid_tc(match):
                 return match
         return None
@@ -43,34 +64,34 @@ class VKNValidator:
     """Turkish Tax Number (VKN) validator."""
     
     @staticmethod
+    @lru_cache(maxsize=_VALIDATION_CACHE_SIZE)
     def is_valid_vkn(vkn: str) -> bool:
         """Validate Turkish Tax Number according to official algorithm."""
-        if not (vkn.isdigit() and len(vkn) == 10):
+        if not (len(vkn) == 10 and vkn.isascii() and vkn.isdigit()):
             return False
 
-        digits = [int(d) for d in vkn]
-        transformed = []
-
-        # Transform each digit
-        for i in range(9):
-            tmp = (digits[i] + (9 - i)) % 10
-            tmp = 10 if tmp == 0 else tmp
-            transformed.append(tmp)
+        # ASCII codes of the digits; a digit's value is its code - 48
+        digits = vkn.encode()
 
-        # Calculate check digit
+        # Transform each digit and calculate check digit
         total = 0
-        for i in range(9):
-            power = 2 ** (9 - i)
-            total += (transformed[i] * power) % 9
+        for i, power in enumerate(_VKN_POW_MOD9):
+            tmp = (digits[i] - 48 + (9 - i)) % 10
+            tmp = 10 if tmp == 0 else tmp
+            total += (tmp * power) % 9
 
         check_digit = (10 - (total % 10)) % 10
-        return digits[9] == check_digit
+        return digits[9] - 48 == check_digit
 
     @staticmethod
     def extract_vkn_from_text(text: str) -> str:
         """Extract valid VKN number from text."""
-        matches = re.findall(r'\b\d{10}\b', text)
-        for match in matches:
+        # Stop scanning at the first valid number instead of collecting all matches
+        for found in _VKN_FIND.finditer(text):
+            match = found.group()
+            # '0000000000' passes the checksum but is a dotted line, not a VKN
+            if _is_repeated_digit(match):
+                continue
             if VKNValidator.is_valid_vkn(match):
                 return match
         return None
@@ -82,14 +103,17 @@ class DocumentIdentifier:
     @staticmethod
     def extract_identifier(text: str) -> str:
         """Extract TC or VKN from text, prioritizing TC."""
-        # Try TC first
-        tc = TCValidator.extract_tc_from_text(text)
-        if tc:
-            return tc
-            
-        # Try VKN if TC not found
-        vkn = VKNValidator.extract_vkn_from_text(text)
-        if vkn:
-            return vkn
-            
-        return None
+        # Scan the text once for both lengths: a valid TC is returned right
+        # away, the first valid VKN only if no TC follows
+        vkn = None
+        for match in _ID_FIND.finditer(text):
+            candidate = match.group()
+            if _is_repeated_digit(candidate):
+                continue
+            if len(candidate) == 11:
+                if candidate[0] != '0' and TCValidator.is_valid_tc(candidate):
+                    return candidate
+            elif vkn is None and VKNValidator.is_valid_vkn(candidate):
+                vkn = candidate
+        
+        return vkn
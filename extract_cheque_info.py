@@ -18,7 +18,12 @@ Requirements:
 2. Set your Gemini API key: export GEMINI_API_KEY="your_api_key_here"
 3. Run: python extract_cheque_info.py
 
-The results will be saved to cheque_extraction_results.json
+Pass --batch to submit all cheques as a single Gemini batch job. Batch jobs cost
+half as much but may take up to 24 hours to complete (requires: pip install google-genai).
+
+The results will be saved to cheque_extraction_results.json. Each result is also
+appended to cheque_extraction_results.jsonl as it arrives; re-running the script
+skips cheques already recorded there.
 """
 
 import os
@@ -50,7 +55,8 @@ def main():
         # Extract information from all cheque files
         output_file = extract_cheque_information(
             gemini_api_key=api_key,
-            output_file="cheque_extraction_results.json"
+            output_file="cheque_extraction_results.json",
+            use_batch='--batch' in sys.argv[1:]
         )
         
         print(f"\n✅ Extraction completed successfully!")
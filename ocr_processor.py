@@ -3,7 +3,7 @@ Legacy OCR processor module - maintained for backward compatibility.
 New implementations should use core.document_processor.DocumentProcessor directly.
 """
 
-from core.document_processor import DocumentProcessor
+from core.processor import get_doc_processor
 
 
 def classify_document(file_path, return_id=False):
@@ -18,5 +18,5 @@ def classify_document(file_path, return_id=False):
     Returns:
         tuple: (category, identifier) if return_id=True, else category only
     """
-    processor = DocumentProcessor()
+    processor = get_doc_processor()
     return processor.process_document(file_path, return_id)
\ No newline at end of file
@@ -0,0 +1,116 @@
+import json
+import os
+
+import pytest
+
+import core.cheque_processor as cheque_processor
+from core.cheque_processor import ChequeProcessor
+
+JPEG_HEADER = b"\xff\xd8\xff\xe0"
+
+
+class FakeExtractor:
+    """Stands in for GeminiChequeExtractor; paths added to failing fail like an exhausted 429."""
+
+    def __init__(self, api_key=None):
+        self.failing = set()
+        self.calls = []
+
+    async def extract_cheque_info_async(self, image_path, return_exceptions=False):
+        self.calls.append(image_path)
+        if image_path in self.failing:
+            error = RuntimeError("429 Resource exhausted")
+            if return_exceptions:
+                return error
+            raise error
+        return {"fileName": os.path.basename(image_path), "iban": image_path}
+
+    def create_null_response(self, filename=None):
+        """Same shape as the real null response, trimmed to the fields used here."""
+        return {"fileName": filename, "iban": None}
+
+
+@pytest.fixture
+def processor(tmp_path, monkeypatch):
+    """A ChequeProcessor reading cheques from a temporary folder."""
+    monkeypatch.setattr(cheque_processor, "GeminiChequeExtractor", FakeExtractor)
+    processor = ChequeProcessor()
+    processor.cheque_folder = str(tmp_path / "cheque")
+    return processor
+
+
+def make_cheque(processor, relative_path):
+    """Create a small file with a JPEG header inside the cheque folder."""
+    path = os.path.join(processor.cheque_folder, *relative_path.split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(JPEG_HEADER)
+    return path
+
+
+def read_checkpoint_lines(checkpoint_path):
+    """Parse every record in a checkpoint file."""
+    with open(checkpoint_path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class TestChequeCheckpoint:
+    """Test resuming cheque extraction from the JSONL checkpoint."""
+
+    def test_failed_cheques_are_not_checkpointed(self, processor, tmp_path):
+        """A failed cheque gets a null result now and is retried on the next run."""
+        good = make_cheque(processor, "1.jpg")
+        bad = make_cheque(processor, "2.jpg")
+        checkpoint_path = str(tmp_path / "results.jsonl")
+        processor.extractor.failing.add(bad)
+
+        results = processor.process_all_cheques(checkpoint_path)
+
+        assert results == [
+            {"fileName": "1.jpg", "iban": good},
+            {"fileName": "2.jpg", "iban": None},
+        ]
+        assert [line["path"] for line in read_checkpoint_lines(checkpoint_path)] == [
+            "1.jpg"
+        ]
+
+        processor.extractor.failing.clear()
+        processor.extractor.calls.clear()
+        results = processor.process_all_cheques(checkpoint_path)
+
+        assert processor.extractor.calls == [bad]
+        assert results[1] == {"fileName": "2.jpg", "iban": bad}
+
+    def test_resume_after_torn_last_line(self, processor, tmp_path):
+        """Recorded cheques are skipped and a partially written line is ignored."""
+        make_cheque(processor, "1.jpg")
+        second = make_cheque(processor, "2.jpg")
+        checkpoint_path = tmp_path / "results.jsonl"
+        recorded = {"path": "1.jpg", "result": {"fileName": "1.jpg", "iban": "saved"}}
+        checkpoint_path.write_text(
+            json.dumps(recorded) + "\n" + '{"path": "2.jpg", "res', encoding="utf-8"
+        )
+
+        results = processor.process_all_cheques(str(checkpoint_path))
+
+        assert processor.extractor.calls == [second]
+        assert results == [
+            {"fileName": "1.jpg", "iban": "saved"},
+            {"fileName": "2.jpg", "iban": second},
+        ]
+        # The torn fragment is terminated, so the new record parses on its own line
+        lines = checkpoint_path.read_text(encoding="utf-8").splitlines()
+        assert json.loads(lines[-1])["path"] == "2.jpg"
+
+    def test_same_name_in_subfolders_is_kept_apart(self, processor, tmp_path):
+        """Checkpoint records are keyed by the path inside the cheque folder."""
+        make_cheque(processor, "a/1.jpg")
+        second = make_cheque(processor, "b/1.jpg")
+        checkpoint_path = tmp_path / "results.jsonl"
+        recorded = {"path": "a/1.jpg", "result": {"fileName": "1.jpg", "iban": "a"}}
+        checkpoint_path.write_text(json.dumps(recorded) + "\n", encoding="utf-8")
+
+        results = processor.process_all_cheques(str(checkpoint_path))
+
+        assert processor.extractor.calls == [second]
+        assert [result["iban"] for result in results] == ["a", second]
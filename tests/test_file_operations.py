@@ -0,0 +1,105 @@
+import os
+
+import pytest
+
+import core.file_operations as file_operations
+from core.file_operations import FileOperations
+
+
+@pytest.fixture(autouse=True)
+def upload_folder(tmp_path, monkeypatch):
+    """Point category folders at a temporary directory and start with empty name caches."""
+    folder = tmp_path / "upload"
+    monkeypatch.setattr(file_operations, "UPLOAD_FOLDER", str(folder))
+    FileOperations.reset_name_cache()
+    yield folder
+    FileOperations.reset_name_cache()
+
+
+def make_file(path, content="new"):
+    """Create a file (and its folder) with the given content."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+    return str(path)
+
+
+class TestMoveFileToCategory:
+    """Test conflict handling when moving files into category folders."""
+
+    def test_counter_continues_after_existing_numbered_name(
+        self, tmp_path, upload_folder
+    ):
+        """A taken name continues after the highest (n) already in the folder."""
+        make_file(upload_folder / "invoice" / "scan.pdf", "old")
+        make_file(upload_folder / "invoice" / "scan(3).pdf", "old")
+        source = make_file(tmp_path / "in" / "a.pdf")
+
+        dest_path = FileOperations.move_file_to_category(source, "invoice", "scan.pdf")
+
+        assert os.path.basename(dest_path) == "scan(4).pdf"
+        assert not os.path.exists(source)
+
+    def test_generated_names_seed_from_existing_numbered_name(self, upload_folder):
+        """generate_unique_filename continues the counter of existing files."""
+        folder = upload_folder / "invoice"
+        first = FileOperations.generate_unique_filename("123", str(folder), "pdf")
+        base_name = first[: -len(".pdf")]
+        make_file(folder / first, "old")
+        make_file(folder / f"{base_name}(2).pdf", "old")
+        FileOperations.reset_name_cache()
+
+        assert (
+            FileOperations.generate_unique_filename("123", str(folder), "pdf")
+            == f"{base_name}(3).pdf"
+        )
+
+    def test_file_created_after_listing_is_not_overwritten(
+        self, tmp_path, upload_folder
+    ):
+        """Names are re-checked on disk, so files added behind the cache survive."""
+        first = make_file(tmp_path / "in" / "a.jpg", "first")
+        FileOperations.move_file_to_category(first, "others", "doc.jpg")
+
+        # Appears after the folder was listed, e.g. from another process
+        make_file(upload_folder / "others" / "doc(1).jpg", "external")
+        second = make_file(tmp_path / "in" / "b.jpg", "second")
+
+        dest_path = FileOperations.move_file_to_category(second, "others", "doc.jpg")
+
+        assert os.path.basename(dest_path) == "doc(2).jpg"
+        assert (upload_folder / "others" / "doc(1).jpg").read_text() == "external"
+        assert (upload_folder / "others" / "doc(2).jpg").read_text() == "second"
+
+    def test_numbered_name_taken_after_listing_keeps_counting(
+        self, tmp_path, upload_folder
+    ):
+        """A generated name found on disk advances its counter instead of nesting one."""
+        folder = upload_folder / "invoice"
+        first = FileOperations.generate_unique_filename("123", str(folder), "pdf")
+        base_name = first[: -len(".pdf")]
+        make_file(folder / first, "old")
+        FileOperations.reset_name_cache()
+        new_filename = FileOperations.generate_unique_filename(
+            "123", str(folder), "pdf"
+        )
+        assert new_filename == f"{base_name}(1).pdf"
+
+        make_file(folder / new_filename, "external")
+        source = make_file(tmp_path / "in" / "a.pdf")
+
+        dest_path = FileOperations.move_file_to_category(
+            source, "invoice", new_filename
+        )
+
+        assert os.path.basename(dest_path) == f"{base_name}(2).pdf"
+        assert (folder / new_filename).read_text() == "external"
+
+    def test_case_only_clash_gets_a_new_name(self, tmp_path, upload_folder):
+        """Names differing only in case count as taken."""
+        make_file(upload_folder / "others" / "Scan.PDF", "old")
+        source = make_file(tmp_path / "in" / "scan.pdf")
+
+        dest_path = FileOperations.move_file_to_category(source, "others")
+
+        assert os.path.basename(dest_path) == "scan(1).pdf"
+        assert (upload_folder / "others" / "Scan.PDF").read_text() == "old"